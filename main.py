@@ -1,27 +1,58 @@
 import os
 import time
+import base64
 import shutil
+import subprocess
+import tempfile
 import csv
 import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing.util import Finalize
 import yaml
+try:
+    from yaml import CSafeLoader as SafeLoader  # Cargador en C de libyaml
+except ImportError:
+    from yaml import SafeLoader
+import cv2
+import numpy as np
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.by import By
-from PIL import Image, ImageOps
-from io import BytesIO
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+from turbojpeg import TurboJPEG, TJPF_RGB, TJSAMP_420
 
 # Constantes para la captura de imágenes
 TOP = 63
 LEFT = 704
 BOTTOM = 1781
 RIGHT = 3136
-SPLIT_HEIGHT = (RIGHT - LEFT) / 2
-PAGE_LEFT = (LEFT, TOP, LEFT + SPLIT_HEIGHT, BOTTOM)
-PAGE_RIGHT = (LEFT + SPLIT_HEIGHT, TOP, RIGHT, BOTTOM)
+PAGE_WIDTH = (RIGHT - LEFT) // 2  # Ancho de cada una de las dos páginas visibles
+PAGE_HEIGHT = BOTTOM - TOP
+# Recorte aplicado por Chrome al capturar, para no transferir los márgenes
+SPREAD_CLIP = {'x': LEFT, 'y': TOP, 'width': 2 * PAGE_WIDTH, 'height': PAGE_HEIGHT, 'scale': 1}
+SCREENSHOT_QUALITY = 90  # Calidad JPEG de la captura de pantalla
+# Espera del renderizado tras pasar página: se sondea hasta que la captura deja de cambiar
+PAGE_RENDER_TIMEOUT = 3.5  # Espera máxima en segundos
+PAGE_RENDER_POLL = 0.1  # Intervalo de sondeo en segundos
+PAGE_RENDER_STABLE = 0.3  # Tiempo mínimo sin cambios para dar las páginas por renderizadas
+# Captura reducida de ambas páginas, usada solo para comparar
+PROBE_CLIP = dict(SPREAD_CLIP, scale=0.25)
 BORDER_SIZE = 50
 IMAGE_QUALITY = 85  # Ajusta la calidad de las imágenes JPEG
+# Codificador jpegli (libjxl): JPEG más pequeños a igual calidad; se usa si está instalado
+CJPEGLI = shutil.which("cjpegli")
+CSV_WORKERS = min(4, os.cpu_count() or 1)  # Procesos de Chrome en paralelo para las filas del CSV
+A4_WIDTH, A4_HEIGHT = 2480, 3508  # Dimensiones A4 en píxeles a 300 DPI
+# Filtros de remuestreo admitidos en config.yaml (clave processing.resample)
+RESAMPLE_FILTERS = {
+    'AREA': cv2.INTER_AREA,
+    'LANCZOS': cv2.INTER_LANCZOS4,
+    'BICUBIC': cv2.INTER_CUBIC,
+}
 
 def load_config(config_file: str) -> dict:
     """
@@ -33,9 +64,43 @@ def load_config(config_file: str) -> dict:
     :rtype: dict
     """
     with open(config_file, 'r') as file:
-        config = yaml.safe_load(file)
+        config = yaml.load(file, Loader=SafeLoader)
     return config
 
+def get_resample_filter(config: dict) -> int:
+    """
+    Obtiene el filtro de remuestreo configurado en ``processing.resample``.
+
+    :param config: Diccionario de configuraciones.
+    :type config: dict
+    :return: Interpolación de OpenCV (AREA por defecto).
+    :rtype: int
+    """
+    name = str((config.get('processing') or {}).get('resample', 'AREA')).upper()
+    if name not in RESAMPLE_FILTERS:
+        raise ValueError(f"Filtro de remuestreo no válido: {name}. Opciones: {', '.join(RESAMPLE_FILTERS)}")
+    return RESAMPLE_FILTERS[name]
+
+# Instancia de libjpeg-turbo compartida por todo el módulo, creada por get_turbojpeg
+_turbojpeg = None
+
+def get_turbojpeg() -> TurboJPEG:
+    """
+    Devuelve la instancia compartida de TurboJPEG, creándola en el primer uso.
+
+    :return: Instancia de TurboJPEG.
+    :rtype: TurboJPEG
+    :raises SystemExit: Si no se puede cargar la biblioteca libjpeg-turbo del sistema.
+    """
+    global _turbojpeg
+    if _turbojpeg is None:
+        try:
+            _turbojpeg = TurboJPEG()
+        except (OSError, RuntimeError) as error:
+            raise SystemExit(f"Error: no se pudo cargar libjpeg-turbo ({error}). "
+                             "Instale la biblioteca del sistema (p. ej. libturbojpeg0 en Debian/Ubuntu).")
+    return _turbojpeg
+
 def parse_arguments() -> argparse.Namespace:
     """
     Analiza los argumentos de la línea de comandos.
@@ -54,12 +119,17 @@ def setup_folder(folder: str) -> None:
     """
     Configura la carpeta para guardar las imágenes, creando una nueva o eliminando la existente.
 
+    La carpeta existente se renombra al instante y se borra en segundo plano, sin bloquear la captura.
+
     :param folder: Ruta a la carpeta.
     :type folder: str
     :return: None
     """
     if os.path.exists(folder):
-        shutil.rmtree(folder)
+        old_folder = f"{os.path.normpath(folder)}.old.{time.time_ns()}"
+        os.rename(folder, old_folder)
+        # Hilo no daemon: el intérprete espera a que termine el borrado antes de salir
+        threading.Thread(target=shutil.rmtree, args=(old_folder,), kwargs={'ignore_errors': True}).start()
     os.makedirs(folder)
 
 def configure_browser(chromedriver_path: str) -> webdriver.Chrome:
@@ -88,17 +158,7 @@ def remove_page_padding(driver: webdriver.Chrome) -> None:
     :return: None
     """
     element = driver.find_element(By.ID, "pagesContainer_documentViewer_parent")
-    driver.execute_script("""
-        var element = arguments[0];
-        var style = element.getAttribute('style');
-        if (style) {
-            var styles = style.split(';');
-            var newStyle = styles.filter(function(s) {
-                return !s.trim().startsWith('padding-top:');
-            }).join(';').trim();
-            element.setAttribute('style', newStyle);
-        }
-    """, element)
+    driver.execute_script("arguments[0].style.paddingTop = '';", element)
 
 def remove_fisheye(driver: webdriver.Chrome) -> None:
     """
@@ -116,111 +176,365 @@ def remove_fisheye(driver: webdriver.Chrome) -> None:
         }
     """, element)
 
-def replace_borders_with_white(image: Image.Image, border_size: int) -> Image.Image:
+def replace_borders_with_white(image: np.ndarray) -> np.ndarray:
     """
-    Reemplaza los bordes izquierdo y derecho de la imagen con una franja blanca del tamaño especificado.
+    Elimina los bordes izquierdo y derecho de la imagen, ``BORDER_SIZE`` píxeles por cada lado.
 
-    :param image: Imagen original.
-    :type image: Image.Image
-    :param border_size: Tamaño del borde en píxeles.
-    :type border_size: int
-    :return: Imagen con bordes reemplazados por blanco.
-    :rtype: Image.Image
-    """
-    width, height = image.size
-    new_width = width - 2 * border_size
+    Devuelve una vista sobre la matriz original, sin copiar píxeles.
 
-    # Crear una nueva imagen con el tamaño deseado (sin bordes)
-    new_image = Image.new("RGB", (new_width, height), "white")
+    :param image: Imagen original como matriz RGB.
+    :type image: np.ndarray
+    :return: Vista de la imagen sin los bordes.
+    :rtype: np.ndarray
+    """
+    width = image.shape[1]
+    return image[:, BORDER_SIZE:width - BORDER_SIZE]
 
-    # Recortar la imagen original para eliminar los bordes
-    cropped_image = image.crop((border_size, 0, width - border_size, height))
+def fit_to_a4(width: int, height: int) -> tuple:
+    """
+    Calcula el tamaño que ajusta una imagen a las dimensiones de A4 manteniendo la relación de aspecto.
+
+    :param width: Ancho original en píxeles.
+    :type width: int
+    :param height: Alto original en píxeles.
+    :type height: int
+    :return: Tupla (ancho, alto) resultante; la original si ya cabe en A4.
+    :rtype: tuple
+    """
+    aspect_ratio = width / height
 
-    # Insertar la imagen recortada en la nueva imagen con bordes blancos
-    new_image.paste(cropped_image, (0, 0))
+    if width > A4_WIDTH or height > A4_HEIGHT:
+        if aspect_ratio > 1:  # Más ancha que alta
+            return A4_WIDTH, int(A4_WIDTH / aspect_ratio)
+        # Más alta que ancha
+        return int(A4_HEIGHT * aspect_ratio), A4_HEIGHT
 
-    return new_image
+    return width, height
 
-def reduce_image_size(image: Image.Image) -> Image.Image:
+def reduce_image_size(image: np.ndarray, out: np.ndarray, interpolation: int = cv2.INTER_AREA) -> np.ndarray:
     """
     Redimensiona la imagen para ajustarla a las dimensiones de A4 mientras mantiene la relación de aspecto.
 
-    :param image: La imagen a redimensionar.
-    :type image: Image.Image
-    :return: Imagen redimensionada.
-    :rtype: Image.Image
+    El resultado se escribe en ``out``, cuyo tamaño debe calcularse con :func:`fit_to_a4`. Si la reducción
+    es de al menos 2x y no se usa ``INTER_AREA``, primero se reduce por el mayor factor entero posible.
+
+    :param image: La imagen a redimensionar como matriz RGB.
+    :type image: np.ndarray
+    :param out: Matriz de destino preasignada.
+    :type out: np.ndarray
+    :param interpolation: Interpolación de OpenCV.
+    :type interpolation: int
+    :return: Matriz ``out`` con la imagen redimensionada.
+    :rtype: np.ndarray
     """
-    width, height = image.size
-    a4_width, a4_height = 2480, 3508  # Dimensiones A4 en píxeles a 300 DPI
-    aspect_ratio = width / height
+    if image.shape == out.shape:
+        np.copyto(out, image)
+        return out
 
-    if width > a4_width or height > a4_height:
-        if aspect_ratio > 1:  # Más ancha que alta
-            new_width = a4_width
-            new_height = int(a4_width / aspect_ratio)
-        else:  # Más alta que ancha
-            new_height = a4_height
-            new_width = int(a4_height * aspect_ratio)
+    height, width = image.shape[:2]
+    out_height, out_width = out.shape[:2]
 
-        image = image.resize((new_width, new_height), Image.LANCZOS)
+    # Reducción previa por un factor entero (promedio por bloques) y ajuste fino con el filtro configurado;
+    # INTER_AREA ya promedia por bloques en cualquier proporción
+    factor = min(width // out_width, height // out_height)
+    if factor >= 2 and interpolation != cv2.INTER_AREA:
+        image = cv2.resize(image, (width // factor, height // factor), interpolation=cv2.INTER_AREA)
 
-    return image
+    cv2.resize(image, (out_width, out_height), dst=out, interpolation=interpolation)
+    return out
+
+def save_jpeg(image: np.ndarray, path: str, buffer: bytearray = None) -> None:
+    """
+    Guarda la imagen como JPEG, usando ``cjpegli`` si está disponible y libjpeg-turbo en caso contrario.
+
+    Si ``cjpegli`` está en el PATH tiene prioridad: no se usan la codificación 4:2:0 de libjpeg-turbo,
+    el búfer de codificación reutilizado ni la escritura con ``os.write``.
+
+    :param image: Imagen RGB a guardar, preferiblemente contigua en memoria para no copiarla.
+    :type image: np.ndarray
+    :param path: Ruta del archivo JPEG de destino.
+    :type path: str
+    :param buffer: Búfer de codificación reutilizable de al menos ``buffer_size`` bytes, o None.
+    :type buffer: bytearray
+    :return: None
+    """
+    if not CJPEGLI:
+        # Submuestreo 4:2:0: la mitad de bytes de croma que 4:4:4, adecuado para páginas escaneadas
+        jpeg = get_turbojpeg()
+        if buffer is None:
+            data = memoryview(jpeg.encode(image, quality=IMAGE_QUALITY, pixel_format=TJPF_RGB,
+                                          jpeg_subsample=TJSAMP_420))
+        else:
+            result, jpeg_size = jpeg.encode(image, quality=IMAGE_QUALITY, pixel_format=TJPF_RGB,
+                                            jpeg_subsample=TJSAMP_420, dst=buffer)
+            data = memoryview(result)[:jpeg_size]
+        # Escritura directa con os.write, sin el búfer intermedio de los objetos archivo de Python
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
+        return
+
+    # cjpegli lee la imagen de un archivo, así que se pasa sin pérdidas como PPM
+    height, width = image.shape[:2]
+    fd, ppm_path = tempfile.mkstemp(suffix=".ppm")
+    try:
+        with os.fdopen(fd, 'wb') as ppm_file:
+            ppm_file.write(f"P6\n{width} {height}\n255\n".encode('ascii'))
+            ppm_file.write(image.tobytes())
+        # -p 0: JPEG secuencial (cjpegli genera JPEG progresivos por defecto)
+        result = subprocess.run([CJPEGLI, ppm_path, path, "-q", str(IMAGE_QUALITY), "-p", "0"],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise RuntimeError(f"cjpegli no pudo guardar {path}: {result.stderr.decode(errors='replace').strip()}")
+    finally:
+        os.remove(ppm_path)
+
+def capture_jpeg(driver: webdriver.Chrome, clip: dict) -> bytes:
+    """
+    Captura una zona del Flipbook como JPEG mediante el protocolo DevTools.
 
-def capture_and_save_images(driver: webdriver.Chrome, actions: ActionChains, folder: str, iterations: int) -> None:
+    :param driver: Instancia del navegador Chrome.
+    :type driver: webdriver.Chrome
+    :param clip: Recorte para ``Page.captureScreenshot``.
+    :type clip: dict
+    :return: Datos JPEG de la captura.
+    :rtype: bytes
+    """
+    result = driver.execute_cdp_cmd("Page.captureScreenshot", {
+        "format": "jpeg",
+        "quality": SCREENSHOT_QUALITY,
+        "clip": clip,
+    })
+    return base64.b64decode(result['data'])
+
+def decode_jpeg(jpeg_buf: bytes, draft_size: tuple = None, dst: np.ndarray = None) -> np.ndarray:
+    """
+    Decodifica una captura JPEG en una matriz RGB.
+
+    Si se indica ``draft_size``, el JPEG se decodifica a la menor escala de libjpeg-turbo que no baje de
+    ese tamaño. Si ``dst`` tiene el tamaño resultante, la captura se decodifica en ella sin asignar memoria.
+
+    :param jpeg_buf: Datos JPEG de la captura.
+    :type jpeg_buf: bytes
+    :param draft_size: Tamaño mínimo (ancho, alto) necesario tras la decodificación.
+    :type draft_size: tuple
+    :param dst: Matriz contigua para reutilizar, o None.
+    :type dst: np.ndarray
+    :return: ``dst`` o una matriz nueva con la captura decodificada.
+    :rtype: np.ndarray
+    """
+    jpeg = get_turbojpeg()
+    width, height = jpeg.decode_header(jpeg_buf)[:2]
+    scaling_factor = None
+    if draft_size:
+        # Reducciones cuyo tamaño escalado (redondeado hacia arriba, como TJSCALED) cubre draft_size
+        candidates = [(num, denom) for num, denom in jpeg.scaling_factors
+                      if num < denom
+                      and -(-width * num // denom) >= draft_size[0]
+                      and -(-height * num // denom) >= draft_size[1]]
+        if candidates:
+            scaling_factor = min(candidates, key=lambda factor: factor[0] / factor[1])
+            num, denom = scaling_factor
+            width, height = -(-width * num // denom), -(-height * num // denom)
+
+    if dst is not None and dst.shape != (height, width, 3):
+        dst = None
+    return jpeg.decode(jpeg_buf, pixel_format=TJPF_RGB, scaling_factor=scaling_factor, dst=dst)
+
+def wait_for_page_render(driver: webdriver.Chrome, previous_frame: str = None) -> str:
+    """
+    Espera a que el Flipbook termine de renderizar las páginas visibles.
+
+    Se toman capturas reducidas cada ``PAGE_RENDER_POLL`` segundos hasta que la captura, distinta de
+    ``previous_frame`` (las páginas anteriores), permanece sin cambios durante ``PAGE_RENDER_STABLE``
+    segundos; así no se da por buena una fase intermedia breve del visor. Si se agota
+    ``PAGE_RENDER_TIMEOUT``, se avisa y se continúa igualmente.
+
+    :param driver: Instancia del navegador Chrome.
+    :type driver: webdriver.Chrome
+    :param previous_frame: Captura reducida de las páginas anteriores, o None.
+    :type previous_frame: str
+    :return: Última captura reducida, para pasarla en la siguiente espera.
+    :rtype: str
+    """
+    last_frame = None
+    unchanged_since = None
+
+    def is_rendered(d: webdriver.Chrome) -> bool:
+        nonlocal last_frame, unchanged_since
+        frame = d.execute_cdp_cmd("Page.captureScreenshot", {
+            "format": "jpeg",
+            "quality": 30,
+            "clip": PROBE_CLIP,
+        })['data']
+        now = time.monotonic()
+        if frame != last_frame or frame == previous_frame:
+            last_frame = frame
+            unchanged_since = now
+            return False
+        return now - unchanged_since >= PAGE_RENDER_STABLE
+
+    try:
+        WebDriverWait(driver, PAGE_RENDER_TIMEOUT, poll_frequency=PAGE_RENDER_POLL).until(is_rendered)
+    except TimeoutException:
+        print(f"Aviso: las páginas no se estabilizaron en {PAGE_RENDER_TIMEOUT} s; "
+              "la captura puede estar incompleta.")
+    return last_frame
+
+def capture_and_save_images(driver: webdriver.Chrome, folder: str, iterations: int,
+                            resample: int = cv2.INTER_AREA) -> None:
     """
     Captura capturas de pantalla del Flipbook y las guarda como imágenes.
 
     :param driver: Instancia del navegador Chrome.
     :type driver: webdriver.Chrome
-    :param actions: Instancia de ActionChains para realizar acciones.
-    :type actions: ActionChains
     :param folder: Carpeta para guardar las imágenes.
     :type folder: str
     :param iterations: Número de iteraciones para capturar imágenes.
     :type iterations: int
+    :param resample: Interpolación de OpenCV.
+    :type resample: int
     :return: None
     """
-    for i in range(iterations):
-        time.sleep(3.5)
-        act_page = i * 2 + 1
-        next_page = i * 2 + 2
-        png = driver.get_screenshot_as_png()
-        full_image = Image.open(BytesIO(png))
-        region_left = full_image.crop(PAGE_LEFT)
-        region_right = full_image.crop(PAGE_RIGHT)
-
-        # Reemplazar los bordes y reducir el tamaño de la imagen
-        img_left = replace_borders_with_white(reduce_image_size(region_left), BORDER_SIZE)
-        img_right = replace_borders_with_white(reduce_image_size(region_right), BORDER_SIZE)
-
-        img_left.save(os.path.join(folder, f"pag_{act_page}.jpg"), format="JPEG", quality=IMAGE_QUALITY)
-        img_right.save(os.path.join(folder, f"pag_{next_page}.jpg"), format="JPEG", quality=IMAGE_QUALITY)
-        actions.click().perform()
-
-def process_single_url(url: str, iterations: int, folder: str, chromedriver_path: str) -> None:
+    # La zona capturada es fija, así que basta con decidir una vez si hay que redimensionar
+    out_width, out_height = fit_to_a4(PAGE_WIDTH, PAGE_HEIGHT)
+    needs_resize = (out_width, out_height) != (PAGE_WIDTH, PAGE_HEIGHT)
+    if needs_resize:
+        draft_size = (2 * out_width, out_height)
+        outs = tuple(np.empty((out_height, out_width, 3), dtype=np.uint8) for _ in range(2))
+    else:
+        draft_size = None
+
+    # Captura decodificada de ambas páginas, matrices contiguas con cada página final y búferes de
+    # codificación, reutilizados en todas las iteraciones
+    pixels = np.empty((PAGE_HEIGHT, 2 * PAGE_WIDTH, 3), dtype=np.uint8)
+    pages = tuple(np.empty((out_height, out_width - 2 * BORDER_SIZE, 3), dtype=np.uint8) for _ in range(2))
+    encode_size = get_turbojpeg().buffer_size(pages[0], TJSAMP_420)
+    encode_buffers = tuple(bytearray(encode_size) for _ in range(2))
+    body = driver.find_element(By.TAG_NAME, "body")
+    saves = []
+    frame = None
+
+    # El guardado JPEG libera el GIL, así que se solapa con la espera del siguiente cambio de página
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        for i in range(iterations):
+            frame = wait_for_page_render(driver, frame)
+            # Una sola captura de ambas páginas; cada mitad es una vista sobre ella
+            pixels = decode_jpeg(capture_jpeg(driver, SPREAD_CLIP), draft_size, pixels)
+            split = pixels.shape[1] // 2
+
+            # Esperar a los guardados anteriores justo antes de sobrescribir sus matrices y búferes;
+            # result() relanza el primer error de escritura y detiene la captura
+            for save in saves[-2:]:
+                save.result()
+
+            for side in range(2):
+                region = pixels[:, side * split:(side + 1) * split]
+                if needs_resize:
+                    region = reduce_image_size(region, outs[side], resample)
+                region = replace_borders_with_white(region)
+
+                # Copiar la página a su matriz contigua para que la codificación no haga otra copia;
+                # si Chrome devolvió otro tamaño, se guarda la vista sin reutilizar el búfer
+                if region.shape == pages[side].shape:
+                    np.copyto(pages[side], region)
+                    page, buffer = pages[side], encode_buffers[side]
+                else:
+                    page, buffer = region, None
+                path = os.path.join(folder, f"pag_{i * 2 + side + 1}.jpg")
+                saves.append(pool.submit(save_jpeg, page, path, buffer))
+
+            # Pasar página con el teclado: no dispara los manejadores de ratón del visor
+            body.send_keys(Keys.ARROW_RIGHT)
+
+    # Propagar cualquier error de escritura
+    for save in saves:
+        save.result()
+
+def process_single_url(driver: webdriver.Chrome, url: str, iterations: int, folder: str,
+                       resample: int = cv2.INTER_AREA) -> None:
     """
     Procesa una URL de Flipbook, capturando y guardando imágenes.
 
+    :param driver: Instancia del navegador Chrome, reutilizada entre URLs.
+    :type driver: webdriver.Chrome
     :param url: URL del Flipbook.
     :type url: str
     :param iterations: Número de iteraciones para capturar imágenes.
     :type iterations: int
     :param folder: Carpeta para guardar las imágenes.
     :type folder: str
-    :param chromedriver_path: Ruta al archivo ejecutable de ChromeDriver.
-    :type chromedriver_path: str
+    :param resample: Interpolación de OpenCV.
+    :type resample: int
     :return: None
     """
     setup_folder(folder)
-    driver = configure_browser(chromedriver_path)
     driver.get(url)
     time.sleep(3)
     remove_page_padding(driver)
     remove_fisheye(driver)
-    actions = ActionChains(driver)
-    actions.move_by_offset(3150, 930)
-    capture_and_save_images(driver, actions, folder, iterations)
-    driver.quit()
+    capture_and_save_images(driver, folder, iterations, resample)
+
+# Navegador propio de cada proceso de trabajo, creado por init_worker
+_worker_driver = None
+
+def init_worker(chromedriver_path: str) -> None:
+    """
+    Inicializa un proceso de trabajo creando su propio navegador, que se cierra al terminar el proceso.
+
+    :param chromedriver_path: Ruta al archivo ejecutable de ChromeDriver.
+    :type chromedriver_path: str
+    :return: None
+    """
+    global _worker_driver
+    _worker_driver = configure_browser(chromedriver_path)
+    # Los procesos del pool no ejecutan atexit, pero sí los finalizadores de multiprocessing
+    Finalize(_worker_driver, _worker_driver.quit, exitpriority=10)
+
+def process_csv_row(url: str, iterations: int, folder: str, resample: int = cv2.INTER_AREA) -> None:
+    """
+    Procesa una fila del CSV con el navegador del proceso de trabajo actual.
+
+    :param url: URL del Flipbook.
+    :type url: str
+    :param iterations: Número de iteraciones para capturar imágenes.
+    :type iterations: int
+    :param folder: Carpeta para guardar las imágenes.
+    :type folder: str
+    :param resample: Interpolación de OpenCV.
+    :type resample: int
+    :return: None
+    """
+    # Evitar que el estado de la URL anterior afecte a la siguiente
+    _worker_driver.delete_all_cookies()
+    process_single_url(_worker_driver, url, iterations, folder, resample)
+
+def process_csv(csv_file: str, chromedriver_path: str, resample: int = cv2.INTER_AREA) -> None:
+    """
+    Procesa en paralelo todas las filas de un CSV, con un navegador por proceso de trabajo.
+
+    :param csv_file: Archivo CSV con URL, iteraciones y carpeta separadas por ';'.
+    :type csv_file: str
+    :param chromedriver_path: Ruta al archivo ejecutable de ChromeDriver.
+    :type chromedriver_path: str
+    :param resample: Interpolación de OpenCV.
+    :type resample: int
+    :return: None
+    """
+    with open(csv_file, newline='') as file:
+        rows = list(csv.reader(file, delimiter=';'))
+    if not rows:
+        return
+
+    with ProcessPoolExecutor(max_workers=min(CSV_WORKERS, len(rows)), initializer=init_worker,
+                             initargs=(chromedriver_path,)) as pool:
+        futures = [pool.submit(process_csv_row, url, int(iterations), folder, resample)
+                   for url, iterations, folder in rows]
+        for future in futures:
+            future.result()
 
 def main() -> None:
     """
@@ -230,15 +544,19 @@ def main() -> None:
     """
     args = parse_arguments()
     config = load_config('config.yaml')
+    resample = get_resample_filter(config)
+    chromedriver_path = config['paths']['chromedriver_path']
+    # Comprobar libjpeg-turbo antes de arrancar Chrome
+    get_turbojpeg()
 
     if args.csv_file:
-        with open(args.csv_file, newline='') as file:
-            reader = csv.reader(file, delimiter=';')
-            for row in reader:
-                url, iterations, folder = row
-                process_single_url(url, int(iterations), folder, config['paths']['chromedriver_path'])
+        process_csv(args.csv_file, chromedriver_path, resample)
     elif args.url and args.iterations and args.folder:
-        process_single_url(args.url, args.iterations, args.folder, config['paths']['chromedriver_path'])
+        driver = configure_browser(chromedriver_path)
+        try:
+            process_single_url(driver, args.url, args.iterations, args.folder, resample)
+        finally:
+            driver.quit()
     else:
         print("Error: Debe proporcionar o bien el CSV o los parámetros individuales --url, --iterations y --folder.")
 